@@ -0,0 +1,41 @@
+"""
+Ahead-of-time compile the simulation kernels into the epi_kernels extension module.
+Requires numba and a C compiler. Run once from this directory:
+
+    python _build_kernels.py
+
+epidemic_simulation.py imports epi_kernels when it exists, so the first frames run at full speed
+instead of waiting for the JIT to compile the kernels.
+"""
+
+import os
+import sys
+
+from numba.pycc import CC
+
+# Import the JIT kernels even if an older epi_kernels build is present
+sys.modules['epi_kernels'] = None
+import epidemic_simulation as sim
+
+cc = CC('epi_kernels')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+cc.export(
+    '_step_motion',
+    'void(f4[:, :], f4[:, :], b1[:], f4[:, :], i8, i8, i8, f8[:], f8[:], i8[:], i8[:])',
+)(sim._step_motion.py_func)
+cc.export(
+    '_build_grid',
+    'UniTuple(i8[:], 2)(f4[:, :], i8[:], i8, i8, i8)',
+)(sim._build_grid.py_func)
+cc.export(
+    '_grid_neighbors',
+    'i8[:](f4[:, :], i8, i8[:], i8[:], i8, i8, i8)',
+)(sim._grid_neighbors.py_func)
+cc.export(
+    '_contact_update',
+    'b1[:](f4[:, :], i1[:], f4[:], i8[:], i8[:], i8, i8, i8, f8, f8[:])',
+)(sim._contact_update.py_func)
+
+if __name__ == "__main__":
+    cc.compile()
@@ -4,11 +4,20 @@ An agent-based simulation modeling the spread of an infectious disease using the
 """
 
 import pygame
-import random
+import pygame.gfxdraw
 import math
+import threading
+import numpy as np
 
 from collections import deque
-from enum import Enum
+
+try:
+    import numba
+    # The TBB threading layer hangs at exit once parallel kernels have run on a non-main thread.
+    # Kernels only ever run on one thread at a time (see UpdateWorker), which workqueue supports.
+    numba.config.THREADING_LAYER = 'workqueue'
+except ImportError:  # Kernels fall back to plain Python
+    numba = None
 
 # Screen dimensions
 WIDTH, HEIGHT = 1200, 700
@@ -33,167 +42,383 @@ RECOVERY_PROB = 0.7  # 70% chance to recover, 30% to die
 VACCINATION_RATE = 0.3  # 30% of population gets vaccinated
 VACCINATION_SUCCESS_RATE = 0.9  # 90% success rate
 MOVEMENT_SPEED = 2
+GROUP_RADIUS = 50  # Distance at which agents are drawn to each other
 
-class AgentState(Enum):
+class AgentState:
+    """Agent states as plain ints, so they compare cheaply and index lookup tables directly"""
     SUSCEPTIBLE = 1
     INFECTED = 2
     RECOVERED = 3
     IMMUNE = 4  # Vaccinated and immune
 
-class Agent:
-    def __init__(self, state=AgentState.SUSCEPTIBLE):
-        self.position = pygame.math.Vector2(random.uniform(50, WIDTH - 50), random.uniform(50, HEIGHT - GRAPH_HEIGHT - 50))
-        angle = random.uniform(0, 2 * math.pi)
-        self.velocity = pygame.math.Vector2(math.cos(angle), math.sin(angle))
-        self.speed = MOVEMENT_SPEED
-        self.state = state
-        self.infection_time = 0  # Time since infection
-        self.contact_time = {}  # Track contact time with infected agents
-        self.in_quarantine = False
-        self.quarantine_position = None
-        
-    def update(self, agents, quarantine_zones, enable_quarantine):
-        """Update agent position and state"""
-        if self.state == AgentState.INFECTED:
-            self.infection_time += 1
-            
-            # Check for recovery or death
-            if self.infection_time >= RECOVERY_TIME:
-                if random.random() < RECOVERY_PROB:
-                    self.state = AgentState.RECOVERED
-                    self.in_quarantine = False
-                else:
-                    return False  # Agent dies
-            
-            # Move to quarantine if enabled and not already there
-            if enable_quarantine and not self.in_quarantine:
-                for zone in quarantine_zones:
-                    if zone.has_space():
-                        self.in_quarantine = True
-                        self.quarantine_position = zone.get_position()
-                        break
-        
-        # Update position
-        if self.in_quarantine and self.quarantine_position:
-            # Move slowly towards quarantine zone
-            direction = (self.quarantine_position - self.position)
-            if direction.length() > 2:
-                self.position += direction.normalize() * self.speed * 0.5
+_SUSCEPTIBLE = AgentState.SUSCEPTIBLE
+
+# Unit vectors for random directions, indexed by a random int instead of calling cos/sin
+_DIR_ANGLES = np.linspace(0, 2 * np.pi, 1024, endpoint=False)
+_DIR_TABLE = np.column_stack((np.cos(_DIR_ANGLES), np.sin(_DIR_ANGLES))).astype(np.float32)
+
+def jit_kernel(parallel=False):
+    """Compile a kernel with numba when it is installed, otherwise leave it as plain Python"""
+    if numba is None:
+        return lambda func: func
+    return numba.njit(cache=True, fastmath=True, boundscheck=False, nogil=True, parallel=parallel)
+
+prange = numba.prange if numba is not None else range
+
+def grid_shape(cell_size):
+    """Number of (columns, rows) of cell_size cells covering the simulation area"""
+    return WIDTH // cell_size + 1, (HEIGHT - GRAPH_HEIGHT) // cell_size + 1
+
+@jit_kernel()
+def _set_direction(vel, i, idx):
+    """Point agent i along _DIR_TABLE[idx]"""
+    vel[i, 0] = _DIR_TABLE[idx, 0]
+    vel[i, 1] = _DIR_TABLE[idx, 1]
+
+@jit_kernel(parallel=True)
+def _step_motion(pos, vel, in_quarantine, quarantine_pos, speed, width, height,
+                 jitter_rolls, direction_rolls, jitter_directions, new_directions):
+    """Move agents, bounce them off the edges and apply random direction changes.
+    
+    The roll arrays hold one pre-sampled uniform number per agent and the direction arrays one
+    pre-sampled _DIR_TABLE index per agent.
+    """
+    for i in prange(len(pos)):
+        if in_quarantine[i]:
+            dx = quarantine_pos[i, 0] - pos[i, 0]
+            dy = quarantine_pos[i, 1] - pos[i, 1]
+            distance_sq = dx * dx + dy * dy
+            if distance_sq > 2 * 2:
+                # Move slowly towards quarantine zone
+                step = speed * 0.5 / math.sqrt(distance_sq)
+                pos[i, 0] += dx * step
+                pos[i, 1] += dy * step
             else:
                 # Random movement within quarantine zone
-                self.position += self.velocity * self.speed * 0.3
-                if random.random() < 0.05:
-                    angle = random.uniform(0, 2 * math.pi)
-                    self.velocity = pygame.math.Vector2(math.cos(angle), math.sin(angle))
+                pos[i, 0] += vel[i, 0] * speed * 0.3
+                pos[i, 1] += vel[i, 1] * speed * 0.3
+                if jitter_rolls[i] < 0.05:
+                    _set_direction(vel, i, jitter_directions[i])
         else:
             # Normal movement
-            self.position += self.velocity * self.speed
-            
-            # Temporary grouping behavior (social behavior)
-            if random.random() < 0.01:
-                nearby_agents = [a for a in agents if a != self and self.position.distance_to(a.position) < 50]
-                if nearby_agents:
-                    # Move towards nearby agent
-                    target = random.choice(nearby_agents)
-                    direction = (target.position - self.position).normalize()
-                    self.velocity = direction
+            pos[i, 0] += vel[i, 0] * speed
+            pos[i, 1] += vel[i, 1] * speed
         
         # Bounce off edges
-        if self.position.x < 0 or self.position.x > WIDTH:
-            self.velocity.x *= -1
-        if self.position.y < 0 or self.position.y > HEIGHT - GRAPH_HEIGHT:
-            self.velocity.y *= -1
+        if pos[i, 0] < 0 or pos[i, 0] > width:
+            vel[i, 0] = -vel[i, 0]
+        if pos[i, 1] < 0 or pos[i, 1] > height:
+            vel[i, 1] = -vel[i, 1]
         
         # Keep within bounds
-        self.position.x = max(0, min(self.position.x, WIDTH))
-        self.position.y = max(0, min(self.position.y, HEIGHT - GRAPH_HEIGHT))
+        pos[i, 0] = min(max(pos[i, 0], 0.0), width)
+        pos[i, 1] = min(max(pos[i, 1], 0.0), height)
         
         # Random direction change
-        if random.random() < 0.02:
-            angle = random.uniform(0, 2 * math.pi)
-            self.velocity = pygame.math.Vector2(math.cos(angle), math.sin(angle))
-        
-        return True  # Agent survives
+        if direction_rolls[i] < 0.02:
+            _set_direction(vel, i, new_directions[i])
+
+@jit_kernel()
+def _build_grid(pos, indices, cell_size, cols, rows):
+    """Counting-sort agent indices by grid cell, returning CSR arrays (cell_starts, cell_items)"""
+    cell_ids = np.empty(len(indices), np.int64)
+    cell_starts = np.zeros(cols * rows + 1, np.int64)
+    for k in range(len(indices)):
+        i = indices[k]
+        cell_ids[k] = (int(pos[i, 0]) // cell_size) * rows + int(pos[i, 1]) // cell_size
+        cell_starts[cell_ids[k] + 1] += 1
+    cell_starts = np.cumsum(cell_starts)
+    fill = cell_starts[:-1].copy()
+    cell_items = np.empty(len(indices), np.int64)
+    for k in range(len(indices)):
+        cell_items[fill[cell_ids[k]]] = indices[k]
+        fill[cell_ids[k]] += 1
+    return cell_starts, cell_items
+
+@jit_kernel()
+def _count_contacts(pos, i, cell_starts, cell_items, cell_size, cols, rows):
+    """Count grid agents closer than cell_size to agent i"""
+    x = pos[i, 0]
+    y = pos[i, 1]
+    cx = int(x) // cell_size
+    cy = int(y) // cell_size
+    radius_sq = cell_size * cell_size
+    count = 0
+    for gx in range(max(cx - 1, 0), min(cx + 2, cols)):
+        for gy in range(max(cy - 1, 0), min(cy + 2, rows)):
+            cell = gx * rows + gy
+            for k in range(cell_starts[cell], cell_starts[cell + 1]):
+                j = cell_items[k]
+                dx = x - pos[j, 0]
+                dy = y - pos[j, 1]
+                if dx * dx + dy * dy < radius_sq:
+                    count += 1
+    return count
+
+@jit_kernel()
+def _grid_neighbors(pos, i, cell_starts, cell_items, cell_size, cols, rows):
+    """Indices of the grid agents other than agent i that are closer than cell_size to it"""
+    x = pos[i, 0]
+    y = pos[i, 1]
+    cx = int(x) // cell_size
+    cy = int(y) // cell_size
+    radius_sq = cell_size * cell_size
+    found = np.empty(len(cell_items), np.int64)
+    count = 0
+    for gx in range(max(cx - 1, 0), min(cx + 2, cols)):
+        for gy in range(max(cy - 1, 0), min(cy + 2, rows)):
+            cell = gx * rows + gy
+            for k in range(cell_starts[cell], cell_starts[cell + 1]):
+                j = cell_items[k]
+                dx = x - pos[j, 0]
+                dy = y - pos[j, 1]
+                if j != i and dx * dx + dy * dy < radius_sq:
+                    found[count] = j
+                    count += 1
+    return found[:count]
+
+@jit_kernel(parallel=True)
+def _contact_update(pos, state, contact_frames, cell_starts, cell_items, cell_size, cols, rows, beta, infection_rolls):
+    """Roll infections for susceptible agents in contact with the agents in the grid.
     
-    def check_infection(self, agents):
-        """Check if agent gets infected through contact"""
-        if self.state != AgentState.SUSCEPTIBLE:
-            return
+    contact_frames grows by one for every frame with at least one contact and decays otherwise.
+    infection_rolls holds one pre-sampled uniform number per agent. Returns the mask of newly
+    infected agents.
+    """
+    n = len(state)
+    infected = np.zeros(n, np.bool_)
+    for i in prange(n):
+        if state[i] != _SUSCEPTIBLE:
+            continue
+        contacts = _count_contacts(pos, i, cell_starts, cell_items, cell_size, cols, rows)
+        if contacts == 0:
+            contact_frames[i] *= 0.9
+            continue
+        contact_frames[i] += 1
+        
+        # Infection probability increases with contact duration
+        chance = min(beta * (1 + contact_frames[i] * 0.01), 1.0)
+        infected[i] = infection_rolls[i] < 1.0 - (1.0 - chance) ** contacts
+    return infected
+
+# Prefer the ahead-of-time compiled kernels built by _build_kernels.py, which skip JIT compilation
+try:
+    from epi_kernels import _step_motion, _build_grid, _grid_neighbors, _contact_update
+except ImportError:
+    pass
+
+# Agent colors indexed by state value (index 0 is unused)
+_STATE_COLORS = (None, SUSCEPTIBLE_COLOR, INFECTED_COLOR, RECOVERED_COLOR, IMMUNE_COLOR)
+
+def get_color(state):
+    """Get the color for an agent state value"""
+    return _STATE_COLORS[state]
+
+def render_agent_sprite(color, radius, outline_radius=0):
+    """Pre-render an agent circle with an optional outline, returning (sprite, offset to its center)"""
+    offset = max(radius, outline_radius)
+    sprite = pygame.Surface((2 * offset + 1, 2 * offset + 1), pygame.SRCALPHA)
+    pygame.gfxdraw.filled_circle(sprite, offset, offset, radius, color)
+    pygame.gfxdraw.aacircle(sprite, offset, offset, radius, color)
+    if outline_radius:
+        pygame.gfxdraw.aacircle(sprite, offset, offset, outline_radius, color)
+    return sprite, offset
+
+class AgentArray:
+    """Agent population stored as parallel NumPy arrays, one row per agent"""
+    FIELDS = ('pos', 'vel', 'state', 'infection_time', 'contact_frames', 'in_quarantine', 'quarantine_pos', 'alive')
+    
+    def __init__(self, states, rng):
+        n = len(states)
+        self.rng = rng
+        self.pos = np.column_stack((
+            rng.uniform(50, WIDTH - 50, n),
+            rng.uniform(50, HEIGHT - GRAPH_HEIGHT - 50, n),
+        )).astype(np.float32)
+        self.vel = _DIR_TABLE[rng.integers(0, len(_DIR_TABLE), n)]
+        self.speed = MOVEMENT_SPEED
+        self.state = np.array(states, dtype=np.int8)
+        self.infection_time = np.zeros(n, dtype=np.int32)  # Time since infection
+        self.contact_frames = np.zeros(n, dtype=np.float32)  # Decaying time spent near infected agents
+        self.in_quarantine = np.zeros(n, dtype=bool)
+        self.quarantine_pos = np.zeros((n, 2), dtype=np.float32)
+        self.alive = np.ones(n, dtype=bool)  # Dead rows stay in place until the next compaction
+    
+    def __len__(self):
+        return len(self.state)
+    
+    def indices(self, state):
+        """Get the indices of living agents in the given state"""
+        return np.flatnonzero((self.state == state) & self.alive)
+    
+    def compact(self):
+        """Drop the rows of dead agents"""
+        alive = self.alive
+        for name in self.FIELDS:
+            setattr(self, name, getattr(self, name)[alive])
+    
+    def update(self, quarantine_zones, enable_quarantine, recovery_prob):
+        """Update agent positions and states, returning the number of agents that died"""
+        infected = (self.state == AgentState.INFECTED) & self.alive
+        self.infection_time[infected] += 1
+        
+        # Check for recovery or death: a single binomial draw decides how many agents at the end
+        # of their infection recover, then that many are picked at random and the rest die
+        due = np.flatnonzero(infected & (self.infection_time >= RECOVERY_TIME))
+        recovered = self.rng.choice(due, self.rng.binomial(len(due), recovery_prob), replace=False)
+        self.state[recovered] = AgentState.RECOVERED
+        self.in_quarantine[recovered] = False
+        died = np.zeros(len(self), dtype=bool)
+        died[due] = True
+        died[recovered] = False
+        self.alive[died] = False
+        
+        # Move to quarantine if enabled and not already there
+        if enable_quarantine:
+            for i in np.flatnonzero(infected & self.alive & ~self.in_quarantine):
+                for zone in quarantine_zones:
+                    if zone.has_space():
+                        self.in_quarantine[i] = True
+                        self.quarantine_pos[i] = zone.get_position()
+                        break
+        
+        # Pre-sample this frame's behavior rolls, one per agent per decision
+        group_rolls, jitter_rolls, direction_rolls = self.rng.random((3, len(self)))
+        jitter_directions, new_directions = self.rng.integers(0, len(_DIR_TABLE), (2, len(self)))
+        
+        # Temporary grouping behavior (social behavior)
+        grouping = np.flatnonzero(~self.in_quarantine & self.alive & (group_rolls < 0.01))
+        if len(grouping):
+            # Index living agents by grid cell so each grouping agent only probes its 9 neighboring cells
+            cell_starts, cell_items = _build_grid(self.pos, np.flatnonzero(self.alive),
+                                                  GROUP_RADIUS, *grid_shape(GROUP_RADIUS))
+            for i in grouping:
+                nearby_agents = _grid_neighbors(self.pos, i, cell_starts, cell_items,
+                                                GROUP_RADIUS, *grid_shape(GROUP_RADIUS))
+                if len(nearby_agents):
+                    # Move towards nearby agent
+                    offset = self.pos[self.rng.choice(nearby_agents)] - self.pos[i]
+                    distance = math.hypot(offset[0], offset[1])
+                    if distance > 0:
+                        self.vel[i] = offset / distance
+        
+        # Update positions
+        _step_motion(self.pos, self.vel, self.in_quarantine, self.quarantine_pos,
+                     self.speed, WIDTH, HEIGHT - GRAPH_HEIGHT, jitter_rolls, direction_rolls,
+                     jitter_directions, new_directions)
+        
+        # Compact only once enough dead rows pile up to amortize the copy
+        if np.count_nonzero(self.alive) < 0.75 * len(self):
+            self.compact()
         
-        for agent in agents:
-            if agent.state == AgentState.INFECTED and agent != self:
-                distance = self.position.distance_to(agent.position)
-                if distance < INFECTION_RADIUS:
-                    # Track contact time
-                    agent_id = id(agent)
-                    if agent_id not in self.contact_time:
-                        self.contact_time[agent_id] = 0
-                    self.contact_time[agent_id] += 1
-                    
-                    # Infection probability increases with contact duration
-                    infection_chance = BASE_INFECTION_PROB * (1 + self.contact_time[agent_id] * 0.01)
-                    if random.random() < infection_chance:
-                        self.state = AgentState.INFECTED
-                        self.infection_time = 0
-                        return
-                else:
-                    # Reset contact time if not in contact
-                    agent_id = id(agent)
-                    if agent_id in self.contact_time:
-                        del self.contact_time[agent_id]
+        return len(due) - len(recovered)
     
-    def vaccinate(self):
-        """Attempt to vaccinate the agent"""
-        if self.state == AgentState.SUSCEPTIBLE:
-            if random.random() < VACCINATION_SUCCESS_RATE:
-                self.state = AgentState.IMMUNE
-                return True
-        return False
+    def check_infection(self, grid, infection_prob):
+        """Infect susceptible agents through contact with infected agents in neighboring grid cells"""
+        cell_starts, cell_items = grid
+        newly_infected = _contact_update(
+            self.pos, self.state, self.contact_frames, cell_starts, cell_items,
+            INFECTION_RADIUS, *grid_shape(INFECTION_RADIUS), infection_prob, self.rng.random(len(self))
+        )
+        self.state[newly_infected] = AgentState.INFECTED
+        self.infection_time[newly_infected] = 0
     
-    def get_color(self):
-        """Get the color based on agent state"""
-        if self.state == AgentState.SUSCEPTIBLE:
-            return SUSCEPTIBLE_COLOR
-        elif self.state == AgentState.INFECTED:
-            return INFECTED_COLOR
-        elif self.state == AgentState.RECOVERED:
-            return RECOVERED_COLOR
-        elif self.state == AgentState.IMMUNE:
-            return IMMUNE_COLOR
+    def count_states(self):
+        """Count agents in each state, indexed by AgentState value"""
+        return np.bincount(self.state[self.alive], minlength=len(_STATE_COLORS)).tolist()
     
-    def draw(self, screen):
-        """Draw the agent"""
-        color = self.get_color()
-        radius = 5 if self.state != AgentState.INFECTED else 6
-        pygame.draw.circle(screen, color, (int(self.position.x), int(self.position.y)), radius)
-        
-        # Draw infection radius for infected agents
-        if self.state == AgentState.INFECTED:
-            pygame.draw.circle(screen, (*INFECTED_COLOR, 30), (int(self.position.x), int(self.position.y)), 
-                             INFECTION_RADIUS, 1)
+    def vaccinate(self, indices):
+        """Attempt to vaccinate the given agents, returning how many became immune"""
+        indices = indices[self.state[indices] == AgentState.SUSCEPTIBLE]
+        vaccinated = indices[self.rng.random(len(indices)) < VACCINATION_SUCCESS_RATE]
+        self.state[vaccinated] = AgentState.IMMUNE
+        return len(vaccinated)
+
+class FrameSnapshot:
+    """Copy of the simulation state read while drawing, so drawing can overlap the next update"""
+    def __init__(self, simulation):
+        agents = simulation.agents
+        self.positions = agents.pos[agents.alive].astype(int)
+        self.states = agents.state[agents.alive]
+        self.counts = simulation.last_counts
+        self.death_count = simulation.statistics.death_count
+        self.histories = simulation.statistics.history_arrays()
+        self.population_max = simulation.statistics.population_max
+        self.rate_max = simulation.statistics.rate_max
+    
+    def draw_agents(self, screen, sprites):
+        """Draw all agents as one batch of pre-rendered sprites"""
+        blit_args = []
+        for (x, y), state in zip(self.positions.tolist(), self.states.tolist()):
+            sprite, offset = sprites[state]
+            blit_args.append((sprite, (x - offset, y - offset)))
+        screen.blits(blit_args, doreturn=False)
+
+class UpdateWorker:
+    """Background thread that runs one simulation update per step() call"""
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.error = None
+        self._start = threading.Event()
+        self._done = threading.Event()
+        self._done.set()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while True:
+            self._start.wait()
+            self._start.clear()
+            if self._stopping:
+                return
+            try:
+                self.simulation.update()
+            except Exception as exc:
+                self.error = exc
+            finally:
+                self._done.set()
+    
+    def step(self):
+        """Start the next update in the background"""
+        self._done.clear()
+        self._start.set()
+    
+    def wait(self):
+        """Block until the running update finishes, re-raising any error it hit"""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+    
+    def stop(self):
+        """Stop the worker thread once the running update finishes"""
+        self._done.wait()
+        self._stopping = True
+        self._start.set()
+        self._thread.join()
 
 class QuarantineZone:
-    def __init__(self, x, y, width, height, capacity=50):
+    def __init__(self, x, y, width, height, font, rng, capacity=50):
         self.rect = pygame.Rect(x, y, width, height)
+        self.rng = rng
         self.capacity = capacity
         self.current_count = 0
+        self.label = font.render('QUARANTINE ZONE', True, QUARANTINE_COLOR)
     
     def has_space(self):
         return self.current_count < self.capacity
     
     def get_position(self):
-        """Get a random position within the quarantine zone"""
-        return pygame.math.Vector2(
-            random.uniform(self.rect.x + 10, self.rect.x + self.rect.width - 10),
-            random.uniform(self.rect.y + 10, self.rect.y + self.rect.height - 10)
+        """Get a random (x, y) position within the quarantine zone"""
+        return (
+            self.rng.uniform(self.rect.x + 10, self.rect.x + self.rect.width - 10),
+            self.rng.uniform(self.rect.y + 10, self.rect.y + self.rect.height - 10)
         )
     
     def draw(self, screen):
         """Draw the quarantine zone"""
         pygame.draw.rect(screen, QUARANTINE_COLOR, self.rect, 2)
-        font = pygame.font.SysFont(None, 20)
-        text = font.render('QUARANTINE ZONE', True, QUARANTINE_COLOR)
-        screen.blit(text, (self.rect.x + 10, self.rect.y + 5))
+        screen.blit(self.label, (self.rect.x + 10, self.rect.y + 5))
 
 class Statistics:
     def __init__(self, max_history=500):
@@ -209,28 +434,37 @@ class Statistics:
         self.total_recoveries = 0
         self.prev_infected = 0
         self.prev_recovered = 0
+        self.population_max = 0  # Running max over the population histories
+        self.rate_max = 0  # Running max over the rate histories
+        self.version = 0  # Bumped on every update to invalidate the cached history arrays
+        self._arrays_version = -1
+        self._arrays = None
     
-    def update(self, agents):
-        """Update statistics"""
-        susceptible = sum(1 for a in agents if a.state == AgentState.SUSCEPTIBLE)
-        infected = sum(1 for a in agents if a.state == AgentState.INFECTED)
-        recovered = sum(1 for a in agents if a.state == AgentState.RECOVERED)
-        immune = sum(1 for a in agents if a.state == AgentState.IMMUNE)
-        
-        self.susceptible_history.append(susceptible)
-        self.infected_history.append(infected)
-        self.recovered_history.append(recovered)
-        self.immune_history.append(immune)
+    def update(self, counts):
+        """Update statistics from per-state agent counts"""
+        susceptible = counts[AgentState.SUSCEPTIBLE]
+        infected = counts[AgentState.INFECTED]
+        recovered = counts[AgentState.RECOVERED]
+        immune = counts[AgentState.IMMUNE]
+        
+        self.population_max = self._record(
+            (self.susceptible_history, self.infected_history, self.recovered_history, self.immune_history),
+            (susceptible, infected, recovered, immune),
+            self.population_max,
+        )
         
         # Calculate rates
         new_infections = max(0, infected - self.prev_infected + (self.prev_recovered - recovered))
         new_recoveries = max(0, recovered - self.prev_recovered)
         
-        infection_rate = new_infections / max(1, len(agents)) * 100
+        infection_rate = new_infections / max(1, sum(counts)) * 100
         recovery_rate = new_recoveries / max(1, infected) * 100 if infected > 0 else 0
         
-        self.infection_rate_history.append(infection_rate)
-        self.recovery_rate_history.append(recovery_rate)
+        self.rate_max = self._record(
+            (self.infection_rate_history, self.recovery_rate_history),
+            (infection_rate, recovery_rate),
+            self.rate_max,
+        )
         
         self.prev_infected = infected
         self.prev_recovered = recovered
@@ -239,36 +473,59 @@ class Statistics:
             self.total_infections += new_infections
         if new_recoveries > 0:
             self.total_recoveries += new_recoveries
+        
+        self.version += 1
     
-    def draw_graphs(self, screen):
-        """Draw graphs showing population and rates over time"""
+    def _record(self, histories, values, running_max):
+        """Append one value to each history and return the updated running max over all of them"""
+        for history, value in zip(histories, values):
+            if len(history) == history.maxlen and history[0] == running_max:
+                running_max = None  # The evicted value may have been the max, rescan below
+            history.append(value)
+        if running_max is None:
+            return max(max(history) for history in histories)
+        return max(running_max, *values)
+    
+    def history_arrays(self):
+        """Get the histories as NumPy arrays, converted at most once per update"""
+        if self._arrays_version != self.version:
+            self._arrays = [
+                np.asarray(history, dtype=float) for history in (
+                    self.susceptible_history, self.infected_history, self.recovered_history,
+                    self.immune_history, self.infection_rate_history, self.recovery_rate_history,
+                )
+            ]
+            self._arrays_version = self.version
+        return self._arrays
+    
+    def draw_graphs(self, screen, font, histories, population_max, rate_max):
+        """Draw graphs showing population and rates over time from history_arrays() and running maxima"""
         graph_y = HEIGHT - GRAPH_HEIGHT + 10
         graph_width = WIDTH // 2 - 20
         graph_height = GRAPH_HEIGHT - 20
+        susceptible, infected, recovered, immune, infection_rate, recovery_rate = histories
         
         # Population graph
-        self._draw_graph(screen, 10, graph_y, graph_width, graph_height, 
-                        [self.susceptible_history, self.infected_history, 
-                         self.recovered_history, self.immune_history],
+        self._draw_graph(screen, font, 10, graph_y, graph_width, graph_height, 
+                        [susceptible, infected, recovered, immune], population_max,
                         [SUSCEPTIBLE_COLOR, INFECTED_COLOR, RECOVERED_COLOR, IMMUNE_COLOR],
                         "Population Over Time",
                         ["Susceptible", "Infected", "Recovered", "Immune"])
         
         # Rates graph
-        self._draw_graph(screen, WIDTH // 2 + 10, graph_y, graph_width, graph_height,
-                        [self.infection_rate_history, self.recovery_rate_history],
+        self._draw_graph(screen, font, WIDTH // 2 + 10, graph_y, graph_width, graph_height,
+                        [infection_rate, recovery_rate], rate_max,
                         [INFECTED_COLOR, RECOVERED_COLOR],
                         "Infection & Recovery Rates (%)",
                         ["Infection Rate", "Recovery Rate"])
     
-    def _draw_graph(self, screen, x, y, width, height, data_lists, colors, title, labels):
+    def _draw_graph(self, screen, font, x, y, width, height, data_lists, max_value, colors, title, labels):
         """Helper method to draw a graph"""
         # Background
         pygame.draw.rect(screen, (20, 20, 30), (x, y, width, height))
         pygame.draw.rect(screen, (100, 100, 100), (x, y, width, height), 1)
         
         # Title
-        font = pygame.font.SysFont(None, 20)
         title_text = font.render(title, True, TEXT_COLOR)
         screen.blit(title_text, (x + 10, y + 5))
         
@@ -281,7 +538,6 @@ class Statistics:
         
         # Draw data
         if any(len(data) > 1 for data in data_lists):
-            max_value = max(max(data) if data else 0 for data in data_lists)
             if max_value == 0:
                 max_value = 1
             
@@ -292,17 +548,15 @@ class Statistics:
             
             for data, color in zip(data_lists, colors):
                 if len(data) > 1:
-                    points = []
-                    for i, value in enumerate(data):
-                        px = graph_x_start + (i / len(data)) * graph_draw_width
-                        py = graph_y_start - (value / max_value) * graph_draw_height
-                        points.append((px, py))
-                    
-                    if len(points) > 1:
-                        pygame.draw.lines(screen, color, False, points, 2)
+                    # Keep at most about one point per horizontal pixel
+                    stride = max(1, len(data) // graph_draw_width)
+                    indices = np.arange(0, len(data), stride)
+                    px = graph_x_start + indices / len(data) * graph_draw_width
+                    py = graph_y_start - data[indices] / max_value * graph_draw_height
+                    pygame.draw.aalines(screen, color, False, np.column_stack((px, py)).tolist())
 
 class EpidemicSimulation:
-    def __init__(self):
+    def __init__(self, seed=None):
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Epidemic Simulation (SIR Model)")
@@ -310,11 +564,22 @@ class EpidemicSimulation:
         self.font = pygame.font.SysFont(None, 24)
         self.small_font = pygame.font.SysFont(None, 20)
         
-        # Initialize simulation
-        self.agents = []
+        # Pre-render agent sprites, indexed by state value like _STATE_COLORS
+        self.sprites = [None] * len(_STATE_COLORS)
+        for state in range(1, len(_STATE_COLORS)):
+            if state == AgentState.INFECTED:
+                # Infected agents are drawn larger and show their infection radius
+                self.sprites[state] = render_agent_sprite(get_color(state), 6, INFECTION_RADIUS)
+            else:
+                self.sprites[state] = render_agent_sprite(get_color(state), 5)
+        
+        # Initialize simulation; a single generator drives all randomness, so a seed reproduces a run
+        self.rng = np.random.default_rng(seed)
+        self.agents = None
+        self.last_counts = None
         self.statistics = Statistics()
         self.quarantine_zones = [
-            QuarantineZone((WIDTH - 200) // 2, 50, 200, 200)
+            QuarantineZone((WIDTH - 200) // 2, 50, 200, 200, self.small_font, self.rng)
         ]
         
         # Simulation parameters (adjustable)
@@ -331,24 +596,23 @@ class EpidemicSimulation:
     
     def reset_simulation(self):
         """Reset the simulation to initial state"""
-        self.agents = []
         self.statistics = Statistics()
         self.frame_count = 0
         
-        # Create susceptible agents
-        for _ in range(INITIAL_POPULATION - INITIAL_INFECTED):
-            self.agents.append(Agent(AgentState.SUSCEPTIBLE))
-        
-        # Create infected agents
-        for _ in range(INITIAL_INFECTED):
-            self.agents.append(Agent(AgentState.INFECTED))
+        # Create susceptible and infected agents
+        self.agents = AgentArray(
+            [AgentState.SUSCEPTIBLE] * (INITIAL_POPULATION - INITIAL_INFECTED) +
+            [AgentState.INFECTED] * INITIAL_INFECTED,
+            self.rng,
+        )
         
         # Vaccinate a portion of the population
-        if random.random() < self.vaccination_rate_multiplier:
+        if self.rng.random() < self.vaccination_rate_multiplier:
             num_to_vaccinate = int(INITIAL_POPULATION * VACCINATION_RATE * self.vaccination_rate_multiplier)
-            susceptible_agents = [a for a in self.agents if a.state == AgentState.SUSCEPTIBLE]
-            for agent in random.sample(susceptible_agents, min(num_to_vaccinate, len(susceptible_agents))):
-                agent.vaccinate()
+            susceptible_agents = self.agents.indices(AgentState.SUSCEPTIBLE)
+            self.agents.vaccinate(self.rng.choice(susceptible_agents, min(num_to_vaccinate, len(susceptible_agents)), replace=False))
+        
+        self.last_counts = self.agents.count_states()
 
     def load_scenario(self, scenario_id):
         """Load a specific simulation scenario"""
@@ -398,10 +662,10 @@ class EpidemicSimulation:
                     self.load_scenario(2)
                 elif event.key == pygame.K_v:
                     # Vaccinate remaining susceptible agents
-                    susceptible = [a for a in self.agents if a.state == AgentState.SUSCEPTIBLE]
-                    for agent in susceptible:
-                        if random.random() < VACCINATION_RATE * self.vaccination_rate_multiplier:
-                            agent.vaccinate()
+                    susceptible = self.agents.indices(AgentState.SUSCEPTIBLE)
+                    selected = self.rng.random(len(susceptible)) < VACCINATION_RATE * self.vaccination_rate_multiplier
+                    self.agents.vaccinate(susceptible[selected])
+                    self.last_counts = self.agents.count_states()
     
     def update(self):
         """Update simulation state"""
@@ -411,36 +675,31 @@ class EpidemicSimulation:
         self.frame_count += 1
         
         # Update infection probability based on multiplier
-        global BASE_INFECTION_PROB, RECOVERY_PROB
         effective_infection_prob = BASE_INFECTION_PROB * self.infection_prob_multiplier
         effective_recovery_prob = min(0.99, RECOVERY_PROB * self.recovery_prob_multiplier)
         
         # Update all agents
-        surviving_agents = []
-        for agent in self.agents:
-            # Temporarily modify recovery probability
-            original_recovery = RECOVERY_PROB
-            RECOVERY_PROB = effective_recovery_prob
-            
-            if agent.update(self.agents, self.quarantine_zones, self.enable_quarantine):
-                surviving_agents.append(agent)
-            else:
-                self.statistics.death_count += 1
-            
-            RECOVERY_PROB = original_recovery
+        self.statistics.death_count += self.agents.update(
+            self.quarantine_zones, self.enable_quarantine, effective_recovery_prob
+        )
         
-        self.agents = surviving_agents
+        # Check for infections, unless nobody can infect or be infected. The agent update never
+        # changes susceptible agents, so last frame's susceptible count is still current.
+        infected = self.agents.indices(AgentState.INFECTED)
+        if len(infected) and self.last_counts[AgentState.SUSCEPTIBLE]:
+            # Index infected agents by grid cell so each susceptible only probes its 9 neighboring cells
+            grid = _build_grid(self.agents.pos, infected, INFECTION_RADIUS, *grid_shape(INFECTION_RADIUS))
+            self.agents.check_infection(grid, effective_infection_prob)
         
-        # Check for infections
-        for agent in self.agents:
-            agent.check_infection(self.agents)
+        # Count states once per frame for statistics and the stats panel
+        self.last_counts = self.agents.count_states()
         
         # Update statistics
         if self.frame_count % 5 == 0:  # Update every 5 frames
-            self.statistics.update(self.agents)
+            self.statistics.update(self.last_counts)
     
-    def draw(self):
-        """Draw everything"""
+    def draw(self, snapshot):
+        """Draw everything from a snapshot of the simulation state"""
         self.screen.fill(BACKGROUND_COLOR)
         
         # Draw quarantine zones
@@ -449,34 +708,35 @@ class EpidemicSimulation:
                 zone.draw(self.screen)
         
         # Draw agents
-        for agent in self.agents:
-            agent.draw(self.screen)
+        snapshot.draw_agents(self.screen, self.sprites)
         
         # Draw statistics
-        self.draw_stats()
+        self.draw_stats(snapshot)
         
         # Draw graphs
-        self.statistics.draw_graphs(self.screen)
+        self.statistics.draw_graphs(self.screen, self.small_font, snapshot.histories,
+                                    snapshot.population_max, snapshot.rate_max)
         
         # Draw controls
         self.draw_controls()
         
         pygame.display.flip()
     
-    def draw_stats(self):
+    def draw_stats(self, snapshot):
         """Draw statistics on screen"""
-        susceptible = sum(1 for a in self.agents if a.state == AgentState.SUSCEPTIBLE)
-        infected = sum(1 for a in self.agents if a.state == AgentState.INFECTED)
-        recovered = sum(1 for a in self.agents if a.state == AgentState.RECOVERED)
-        immune = sum(1 for a in self.agents if a.state == AgentState.IMMUNE)
+        counts = snapshot.counts
+        susceptible = counts[AgentState.SUSCEPTIBLE]
+        infected = counts[AgentState.INFECTED]
+        recovered = counts[AgentState.RECOVERED]
+        immune = counts[AgentState.IMMUNE]
         
         stats = [
-            f"Population: {len(self.agents)}",
+            f"Population: {sum(counts)}",
             f"Susceptible: {susceptible}",
             f"Infected: {infected}",
             f"Recovered: {recovered}",
             f"Immune: {immune}",
-            f"Deaths: {self.statistics.death_count}",
+            f"Deaths: {snapshot.death_count}",
             "",
             f"Infection Rate: x{self.infection_prob_multiplier:.1f}",
             f"Recovery Rate: x{self.recovery_prob_multiplier:.1f}",
@@ -523,11 +783,18 @@ class EpidemicSimulation:
     
     def run(self):
         """Main simulation loop"""
+        # The next update runs on a worker thread while this thread draws a snapshot of the
+        # current state; events are handled while the worker is idle
+        worker = UpdateWorker(self)
         while self.running:
             self.clock.tick(60)
             self.handle_events()
-            self.update()
-            self.draw()
+            snapshot = FrameSnapshot(self)
+            worker.step()
+            self.draw(snapshot)
+            worker.wait()
+        
+        worker.stop()
         
         pygame.quit()
 